@@ -3,16 +3,20 @@ warnings.simplefilter(action="ignore", category=FutureWarning)
 
 from pathlib import Path
 import tomllib
+import joblib
 from loguru import logger
 import pandas as pd
-import seaborn as sns
+import matplotlib
+matplotlib.use("Agg")  # files only, no GUI; must run before seaborn imports pyplot
 import matplotlib.pyplot as plt
+import seaborn as sns
 
 # Save and start
 OUTPUT_DIR = Path("/Users/floridomeacci/Documents/HU/MADS-DAV/MADS-DAV/img/florido-images")
 TOPK = 15
 MSG_THRESHOLD = 700
 LEN_THRESHOLD = 50
+CACHE_LIMIT = "500M"  # old cached copies of the chat are evicted beyond this
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 CONFIG_CANDIDATES = [
@@ -33,7 +37,27 @@ datafile = processed / config["current"]
 if not datafile.exists():
     raise FileNotFoundError(f"{datafile} not found. Run preprocessing or fix config.")
 
-df = pd.read_parquet(datafile)
+# On-disk cache of the loaded data, so re-running the plots skips the parsing.
+# Kept next to the project's .gitignore (it holds the full chat), whichever
+# config.toml was found.
+memory = joblib.Memory(SCRIPT_DIR.parent / ".cache", verbose=0)
+
+@memory.cache
+def load(path: Path, mtime_ns: int) -> pd.DataFrame:
+    """Load the chat with the derived columns the plots need.
+
+    mtime_ns is only used as part of the cache key, so a changed file is reloaded.
+    """
+    df = pd.read_parquet(path)
+    df["author"] = df["author"].astype("category")
+    # Arrow-backed strings so str.len / str.contains run as pyarrow kernels
+    df["message"] = df["message"].astype("string[pyarrow]")
+    df["message_length"] = df["message"].str.len()
+    df["has_link"] = df["message"].str.contains("http", regex=False, na=False)
+    return df
+
+df = load(datafile, datafile.stat().st_mtime_ns)
+memory.reduce_size(bytes_limit=CACHE_LIMIT)
 
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -43,79 +67,65 @@ def save_fig(fig, name: str) -> None:
     fig.savefig(out, dpi=300, bbox_inches="tight")
     logger.info(f"Saved {out}")
 
-# 1) Most messages
-p1 = (
-    df[["author", "message"]]
-    .groupby("author").count()
-    .sort_values("message", ascending=False)
+# Per-author statistics for all four plots in a single groupby pass
+agg = df.groupby("author", observed=True, sort=False).agg(
+    message=("message", "size"),
+    message_length=("message_length", "mean"),
+    has_link=("has_link", "mean"),
+    emoji_mean=("has_emoji", "mean"),
 )
-topk = p1.head(TOPK)
+agg.index = agg.index.astype(str)
+
+# One figure reused for all plots, cleared after each save
+fig, ax = plt.subplots(figsize=(10, 6))
+
+# 1) Most messages
+topk = agg[["message"]].nlargest(TOPK, "message")
 colors = [0 if x < MSG_THRESHOLD else 1 for x in topk["message"]]
 palette = {0: "grey", 1: "blue"}
 
-fig1, ax1 = plt.subplots(figsize=(10, 6))
-sns.barplot(y=topk.index, x="message", hue=colors, data=topk, palette=palette, legend=False, ax=ax1)
-ax1.set_title("Sending the most messages...")
-ax1.set_xlabel("message")
-save_fig(fig1, "001_most_messages")
-plt.close(fig1)
+sns.barplot(y=topk.index, x="message", hue=colors, data=topk, palette=palette, legend=False, ax=ax)
+ax.set_title("Sending the most messages...")
+ax.set_xlabel("message")
+save_fig(fig, "001_most_messages")
+ax.clear()
 
 # 2) Longest messages
-df["message_length"] = df["message"].str.len()
-p_len = (
-    df[["author", "message_length"]]
-    .groupby("author").mean()
-    .sort_values("message_length", ascending=False)
-)
-topk_len = p_len.head(TOPK)
+topk_len = agg[["message_length"]].nlargest(TOPK, "message_length")
 colors = [0 if x < LEN_THRESHOLD else 1 for x in topk_len["message_length"]]
 
-fig2, ax2 = plt.subplots(figsize=(10, 6))
 sns.barplot(y=topk_len.index, x="message_length", hue=colors, data=topk_len,
-            palette=palette, dodge=False, legend=False, ax=ax2)
-ax2.set_xlabel("Average message length")
-ax2.set_title("Sending the longest messages...")
-save_fig(fig2, "002_longest_messages")
-plt.close(fig2)
+            palette=palette, dodge=False, legend=False, ax=ax)
+ax.set_xlabel("Average message length")
+ax.set_title("Sending the longest messages...")
+save_fig(fig, "002_longest_messages")
+ax.clear()
 
 # 3) Most links
-df["has_link"] = df["message"].str.contains(r"http")
 if df["has_link"].sum() > 0:
-    p_link = (
-        df[["author", "has_link"]]
-        .groupby("author").mean()
-        .sort_values("has_link", ascending=False)
-    ).head(TOPK)
+    p_link = agg[["has_link"]].nlargest(TOPK, "has_link")
 
-    imax = int(p_link["has_link"].to_numpy().argmax())
+    imax = p_link["has_link"].values.argmax()
     colors = [1 if i == imax else 0 for i in range(len(p_link))]
 
-    fig3, ax3 = plt.subplots(figsize=(10, 6))
     sns.barplot(y=p_link.index, x="has_link", hue=colors, data=p_link,
-                palette=palette, dodge=False, legend=False, ax=ax3)
-    ax3.set_xlabel("Fraction of messages with a link")
-    ax3.set_title("Most links by...")
-    save_fig(fig3, "003_most_links")
-    plt.close(fig3)
+                palette=palette, dodge=False, legend=False, ax=ax)
+    ax.set_xlabel("Fraction of messages with a link")
+    ax.set_title("Most links by...")
+    save_fig(fig, "003_most_links")
+    ax.clear()
 else:
     logger.info("No links found in the messages")
 
 # 4) Most emojis
-p_emoji = (
-    df[["author", "has_emoji"]]
-    .groupby("author").agg(["sum", "mean"])
-    .sort_values(("has_emoji", "sum"), ascending=False)
-)
-p_emoji.columns = p_emoji.columns.droplevel(0)
-topk_emoji = p_emoji.sort_values("mean", ascending=False).head(TOPK)
+topk_emoji = agg["emoji_mean"].nlargest(TOPK).to_frame("mean")
 
-imax = int(topk_emoji["mean"].to_numpy().argmax())
+imax = topk_emoji["mean"].values.argmax()
 colors = [1 if i == imax else 0 for i in range(len(topk_emoji))]
 
-fig4, ax4 = plt.subplots(figsize=(10, 6))
 sns.barplot(y=topk_emoji.index, x="mean", hue=colors, data=topk_emoji,
-            palette=palette, dodge=False, legend=False, ax=ax4)
-ax4.set_xlabel("Average number of messages with an emoji")
-ax4.set_title("Sending the most emoji's")
-save_fig(fig4, "004_most_emojis")
-plt.close(fig4)
\ No newline at end of file
+            palette=palette, dodge=False, legend=False, ax=ax)
+ax.set_xlabel("Average number of messages with an emoji")
+ax.set_title("Sending the most emoji's")
+save_fig(fig, "004_most_emojis")
+plt.close(fig)
@@ -11,6 +11,10 @@ class FileHandler:
     def load(self, filepath: Path) -> pd.DataFrame:
         """Load preprocessed WhatsApp data."""
         timecol = self.config.time_col
-        data = pd.read_csv(filepath, parse_dates=[timecol])
+        if filepath.suffix in (".parquet", ".parq"):
+            columns = [timecol, self.config.node_col]
+            data = pd.read_parquet(filepath, columns=columns)
+        else:
+            data = pd.read_csv(filepath, parse_dates=[timecol])
         logger.success(f"Loade data from {filepath}")
         return data
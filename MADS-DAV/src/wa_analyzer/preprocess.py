@@ -1,8 +1,9 @@
+import functools
 import re
 import sys
 import tomllib
 import unicodedata
-from datetime import datetime, timezone
+from datetime import datetime
 from pathlib import Path
 import json
 
@@ -15,12 +16,62 @@ from wa_analyzer.settings import (BaseRegexes, Folders, PreprocessConfig,
                                   oldRegexes)
 from wa_analyzer.humanhasher import humanize
 
+try:
+    import orjson
+except ImportError:  # optional, fall back to the stdlib encoder
+    orjson = None
+
 logger.remove()
 logger.add("logs/logfile.log", rotation="1 week", level="DEBUG")
 logger.add(sys.stderr, level="INFO")
 
 logger.debug(f"Python path: {sys.path}")
 
+_ZW_RE = re.compile(r"[\u200B-\u200D\uFEFF]")
+_TILDE_RE = re.compile(r"^[~\u223C]\s*")
+_WS_RE = re.compile(r"\s+")
+# NBSP and NNBSP (narrow no-break space) -> regular space
+_SPACE_TABLE = str.maketrans({"\u00A0": " ", "\u202F": " "})
+
+
+@functools.lru_cache(maxsize=None)
+def normalize_author(name: str) -> str:
+    """Return a canonical representation of an author name.
+
+    This reduces spurious duplicates caused by invisible characters,
+    tildes/prefixes, and odd unicode spaces.
+
+    Steps:
+    - Unicode normalize to NFKC (compatibility composition)
+    - Remove zero-width chars (ZWSP, ZWJ, ZWNJ, BOM)
+    - Replace non-breaking space variants with regular spaces
+    - Remove leading tilde variants and adjacent spaces (seen in exports)
+    - Collapse internal whitespace and strip ends
+
+    We intentionally do NOT change case or strip diacritics to preserve
+    readability of display names while still unifying common variants.
+    """
+    if not isinstance(name, str):
+        return name
+    # Plain ASCII names without a tilde or stray whitespace are already
+    # canonical, so skip NFKC and the regexes for them
+    if (
+        name.isascii()
+        and not name.startswith("~")
+        and " ".join(name.split()) == name
+    ):
+        return name
+    s = unicodedata.normalize("NFKC", name)
+    # Remove zero-width characters
+    s = _ZW_RE.sub("", s)
+    # Normalize common non-breaking spaces to regular spaces
+    s = s.translate(_SPACE_TABLE)
+    # Remove leading tilde variants and any following spaces
+    s = _TILDE_RE.sub("", s)
+    # Collapse whitespace
+    s = _WS_RE.sub(" ", s).strip()
+    return s
+
 
 class WhatsappPreprocessor:
     def __init__(self, config: PreprocessConfig):
@@ -29,55 +80,44 @@ class WhatsappPreprocessor:
         self.datetime_format = config.datetime_format
         self.drop_authors = config.drop_authors
 
+        # anchored, so str.extract (re.search) keeps re.match semantics
+        self._tsreg = re.compile(r"^(?:" + self.regexes.timestamp + ")")
+        self._messagereg = re.compile(self.regexes.message)
+        self._authorreg = re.compile(self.regexes.author)
+        self._tsliteral = self.regexes.timestamp_literal
+        # one alternation instead of a substring test per drop_author
+        self._drop_re = (
+            re.compile("|".join(re.escape(a) for a in self.drop_authors))
+            if self.drop_authors
+            else None
+        )
+
     def __call__(self):
         records, _ = self.process()
         self.save(records)
 
-    @staticmethod
-    def normalize_author(name: str) -> str:
-        """Return a canonical representation of an author name.
-
-        This reduces spurious duplicates caused by invisible characters,
-        tildes/prefixes, and odd unicode spaces.
-
-        Steps:
-        - Unicode normalize to NFKC (compatibility composition)
-        - Remove zero-width chars (ZWSP, ZWJ, ZWNJ, BOM)
-        - Replace non-breaking space variants with regular spaces
-        - Remove leading tilde variants and adjacent spaces (seen in exports)
-        - Collapse internal whitespace and strip ends
-
-        We intentionally do NOT change case or strip diacritics to preserve
-        readability of display names while still unifying common variants.
-        """
-        if not isinstance(name, str):
-            return name
-        s = unicodedata.normalize("NFKC", name)
-        # Remove zero-width characters
-        s = re.sub(r"[\u200B-\u200D\uFEFF]", "", s)
-        # Normalize common non-breaking spaces to regular spaces
-        s = s.replace("\u00A0", " ")  # NBSP
-        s = s.replace("\u202F", " ")  # NNBSP (narrow no-break space)
-        # Remove leading tilde variants and any following spaces
-        s = re.sub(r"^[~\u223C]\s*", "", s)
-        # Collapse whitespace
-        s = re.sub(r"\s+", " ", s).strip()
-        return s
-
-    def save(self, records: list[tuple]) -> Path:
-        df = pd.DataFrame(records, columns=["timestamp", "author", "message"])
+    # kept on the class for callers such as the cleaning notebook
+    normalize_author = staticmethod(normalize_author)
+
+    def save(self, df: pd.DataFrame) -> Path:
         now = datetime.now().strftime("%Y%m%d-%H%M%S")
-        outfile = self.folders.processed / f"whatsapp-{now}.csv"
+        outfile = self.folders.processed / f"whatsapp-{now}.parquet"
         logger.info(f"Writing to {outfile}")
-        df.to_csv(outfile, index=False)
+        df.to_parquet(outfile, engine="pyarrow", compression="snappy", index=False)
         # Also write anonymized reference mapping built from ORIGINAL authors
         try:
             authors = df["author"].dropna().unique().tolist()
             anon = {k: humanize(k) for k in authors}
             ref = {v: k for k, v in anon.items()}  # anonymized -> original
             reference_file = self.folders.processed / "anon_reference.json"
-            with reference_file.open("w", encoding="utf-8") as f:
-                json.dump({k: ref[k] for k in sorted(ref.keys())}, f, ensure_ascii=False, indent=2)
+            ordered = {k: ref[k] for k in sorted(ref.keys())}
+            if orjson is not None:
+                reference_file.write_bytes(
+                    orjson.dumps(ordered, option=orjson.OPT_INDENT_2)
+                )
+            else:
+                with reference_file.open("w", encoding="utf-8") as f:
+                    json.dump(ordered, f, ensure_ascii=False, indent=2)
             logger.info(f"Wrote anonymization reference to {reference_file}")
         except Exception as e:
             logger.warning(f"Could not write anon_reference.json: {e}")
@@ -85,51 +125,72 @@ class WhatsappPreprocessor:
 
         return outfile
 
-    def process(self) -> tuple:
-        records = []
-        appended = []
+    def process(self) -> tuple[pd.DataFrame, pd.Series]:
         datafile = self.folders.raw / self.folders.datafile
 
-        tsreg = self.regexes.timestamp
-        messagereg = self.regexes.message
-        authorreg = self.regexes.author
-
         with datafile.open(encoding="utf-8") as f:
-            for line_number, line in enumerate(f.readlines()):
-                ts = re.match(tsreg, line)
-                if ts:
-                    try:
-                        timestamp = datetime.strptime(
-                            ts.groups()[0], self.datetime_format
-                        ).replace(tzinfo=timezone.utc)
-                    except ValueError as e:
-                        logger.error(
-                            f"Error while processing timestamp of line {line_number}: {e}"
-                        )
-                        continue
-                    msg_ = re.search(messagereg, line)
-                    author_ = re.search(authorreg, line)
-                    if msg_ is None:
-                        logger.error(
-                            f"Could not find a message for line {line_number}. Please check the data and / or the message regex"
-                        )
-                        continue
-                    if author_ is None:
-                        logger.error(
-                            f"Could not find an author for line {line_number}. Please check the data and / or the author regex"
-                        )
-                        continue
-                    raw_author = author_.groups()[0].strip()
-                    author = self.normalize_author(raw_author)
-                    if any(drop_author in author for drop_author in self.drop_authors):
-                        logger.warning(f"Skipping author {author}")
-                        continue
-                    msg = msg_.groups()[0].strip()
-                    records.append((timestamp, author, msg))
-                elif len(records) > 0:
-                    appended.append(timestamp)
-                    msg += " " + line.strip()
-                    records[-1] = (timestamp, author, msg)
+            lines = f.read().split("\n")
+        if lines and lines[-1] == "":
+            lines.pop()
+        lines = pd.Series(lines, dtype=object)
+
+        # cheap substring check before handing the lines to the regex
+        candidates = lines[lines.str.contains(self._tsliteral, regex=False)]
+        ts = candidates.str.extract(self._tsreg)[0].dropna()
+
+        # many messages share a timestamp string, so parse each unique one once
+        timestamp = pd.to_datetime(
+            ts, format=self.datetime_format, errors="coerce", utc=True, cache=True
+        )
+        startlines = lines[ts.index]
+        msg = startlines.str.extract(self._messagereg)[0]
+        author = startlines.str.extract(self._authorreg)[0]
+
+        for line_number in ts.index[timestamp.isna()]:
+            logger.error(
+                f"Error while processing timestamp of line {line_number}: "
+                f"'{ts[line_number]}' does not match format '{self.datetime_format}'"
+            )
+        for line_number in ts.index[timestamp.notna() & msg.isna()]:
+            logger.error(
+                f"Could not find a message for line {line_number}. Please check the data and / or the message regex"
+            )
+        for line_number in ts.index[timestamp.notna() & msg.notna() & author.isna()]:
+            logger.error(
+                f"Could not find an author for line {line_number}. Please check the data and / or the author regex"
+            )
+
+        valid = timestamp.notna() & msg.notna() & author.notna()
+        # build the frame column-wise from the already filtered columns
+        records = pd.DataFrame(
+            {
+                "timestamp": timestamp[valid],
+                "author": author[valid].str.strip().map(normalize_author),
+                "message": msg[valid].str.strip(),
+            }
+        )
+
+        # every valid record opens a group; lines without a timestamp belong
+        # to the group of the record before them
+        group = pd.Series(lines.index.isin(records.index), index=lines.index).cumsum()
+        is_continuation = ~lines.index.isin(ts.index)
+
+        if self._drop_re is not None:
+            dropped = records["author"].str.contains(self._drop_re)
+        else:
+            dropped = pd.Series(False, index=records.index)
+        for name, count in records.loc[dropped, "author"].value_counts().items():
+            logger.warning(f"Skipping {count} messages of author {name}")
+        records = records.loc[~dropped]
+        records.index = group[records.index]
+
+        # continuation lines of skipped authors are dropped with them
+        appended = lines[is_continuation & group.isin(records.index)].str.strip()
+        continued = appended.groupby(group[appended.index]).agg(" ".join)
+        records = records.assign(
+            message=records["message"]
+            + (" " + continued).reindex(records.index, fill_value="")
+        ).reset_index(drop=True)
 
         logger.info(f"Found {len(records)} valid records")
         logger.info(f"Appended {len(appended)} records")
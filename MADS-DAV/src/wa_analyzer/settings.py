@@ -12,12 +12,16 @@ class BaseRegexes(BaseModel):
     timestamp: str
     author: str
     message: str
+    # literal that every timestamp match contains; lines without it are
+    # continuation lines and skip the regex entirely. "" disables the check.
+    timestamp_literal: str = ""
 
 
 iosRegexes = BaseRegexes(
     timestamp=r"\[(.+?)]\s.+?:.+",
     author=r"\[.+?]\s(.+?):.+",
     message=r"\[.+?]\s.+?:(.+)",
+    timestamp_literal="[",
 )
 
 
@@ -25,18 +29,21 @@ androidRegexes = BaseRegexes(
     timestamp=r"(.+?)\s-\s.+?:.+",
     author=r".+?\s-\s(.+?):.+",
     message=r".+?\s-\s.+?:(.*)",
+    timestamp_literal="-",
 )
 
 oldRegexes = BaseRegexes(
     timestamp=r"^\d{1,2}/\d{1,2}/\d{2}, \d{2}:\d{2}",
     author=r"(?<=\s-\s)(.*?)(?=:)",
     message=r"^\d{1,2}/\d{1,2}/\d{2}, \d{2}:\d{2}[-~a-zA-Z0-9\s]+:",
+    timestamp_literal=", ",
 )
 
 csvRegexes = BaseRegexes(
     timestamp=r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})",
     author=r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},([^,]+),",
     message=r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},[^,]+,(.+)",
+    timestamp_literal=":",
 )
 
 
@@ -1,6 +1,5 @@
 from pathlib import Path
 
-import pandas as pd
 import streamlit as st
 
 from wa_analyzer.network_analysis import (Config, NetworkAnalysis,
@@ -26,7 +25,11 @@ with st.sidebar:
 
     # File selection
     processed_dir = Path("data/processed")
-    available_files = [f.name for f in processed_dir.glob("*.csv")]
+    available_files = sorted(
+        f.name
+        for pattern in ("*.csv", "*.parquet")
+        for f in processed_dir.glob(pattern)
+    )
     current_file = st.session_state.settingsmanager.settings["current_values"].get(
         "selected_file", None
     )
@@ -317,8 +320,6 @@ if selected_file:
     )
     na = NetworkAnalysis(config)
 
-    data = pd.read_csv(processed_dir / selected_file)
-
     # Create config
     config = NetworkAnalysisConfig(
         response_window=response_window,